@@ -31,7 +31,13 @@ class IndexEntry(Model):
 
     class Meta:
         table = "index_entries"
-        indexes = [("document_type", "document_id")]
+        # (token_id, document_id, weight) covers the search aggregation, so it is
+        # answered from the index alone. It makes every entry insert more
+        # expensive, which pays off since searches far outnumber index writes.
+        indexes = [
+            ("document_type", "document_id"),
+            ("token_id", "document_id", "weight"),
+        ]
 
     def __str__(self):
         return f"Token {self.token_id} in doc {self.document_id}"
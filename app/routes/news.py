@@ -1,5 +1,7 @@
+import time
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List, Optional, Annotated
+from tortoise.functions import Count
 
 from app.models import NewsClassification
 from app.services.search.indexing import IndexingService, DefaultIndexingService
@@ -8,32 +10,49 @@ from app.schemas import (
     NewsClassificationCreate,
     NewsClassificationUpdate,
     NewsClassificationResponse,
+    PaginatedResponse,
 )
 
 router = APIRouter(prefix="/news", tags=["news-classification"])
 NewsSearchService = Annotated[SearchService, Depends(DefaultSearchService)]
 NewsIndexingService = Annotated[IndexingService, Depends(DefaultIndexingService)]
 
+# Statistics are served from memory for this many seconds before being recomputed.
+STATS_CACHE_TTL = 30
+_stats_cache = {"ts": 0.0, "payload": None}
 
-@router.get("/", response_model=List[NewsClassificationResponse])
+
+@router.get("/", response_model=PaginatedResponse[NewsClassificationResponse])
 async def list_news_classifications(
-    skip: int = Query(0, ge=0),
+    after_id: Optional[int] = Query(None, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     label: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
 ):
     """
-    List all news classifications with optional filtering and pagination.
+    List all news classifications with optional filtering and keyset pagination.
 
-    - **skip**: Number of records to skip (default: 0)
+    - **after_id**: Return records with an ID greater than this cursor
     - **limit**: Maximum number of records to return (default: 100, max: 1000)
     - **label**: Optional filter by label
+    - **skip**: Deprecated, use `after_id` instead. Only applied without a cursor
+
+    The response contains `next_cursor`, to be passed as `after_id` for the next
+    page, or null when there are no more records.
     """
-    query = NewsClassification.all()
+    query = NewsClassification.all().order_by("id")
 
     if label:
         query = query.filter(label__iexact=label)
 
-    return await query.offset(skip).limit(limit)
+    if after_id is not None:
+        query = query.filter(id__gt=after_id)
+    elif skip:
+        query = query.offset(skip)
+
+    results = await query.limit(limit)
+    next_cursor = results[-1].id if len(results) == limit else None
+    return {"items": results, "next_cursor": next_cursor}
 
 
 @router.get("/{news_id}", response_model=NewsClassificationResponse)
@@ -100,16 +119,32 @@ async def search_news(
 
 @router.get("/stats/summary")
 async def get_statistics():
-    """Get statistics about news classifications."""
-    total = await NewsClassification.all().count()
-
-    # Get unique labels and their counts
-    labels = await NewsClassification.all().values_list("label", flat=True)
-    label_counts = {}
-    for label in labels:
-        label_counts[label] = label_counts.get(label, 0) + 1
+    """
+    Get statistics about news classifications.
 
-    return {
-        "total_records": total,
+    Results are cached for `STATS_CACHE_TTL` seconds, so recent writes may take
+    that long to show up.
+    """
+    now = time.monotonic()
+    if (
+        _stats_cache["payload"] is not None
+        and now - _stats_cache["ts"] < STATS_CACHE_TTL
+    ):
+        return _stats_cache["payload"]
+
+    # Get unique labels and their counts; the total is their sum, which avoids
+    # a separate COUNT(*) over the table
+    rows = (
+        await NewsClassification.annotate(count=Count("id"))
+        .group_by("label")
+        .values_list("label", "count")
+    )
+    label_counts = dict(rows)
+
+    payload = {
+        "total_records": sum(label_counts.values()),
         "label_distribution": label_counts,
     }
+    _stats_cache["ts"] = now
+    _stats_cache["payload"] = payload
+    return payload
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
 
 
 class NewsClassificationBase(BaseModel):
@@ -26,9 +28,15 @@ class NewsClassificationUpdate(BaseModel):
 class NewsClassificationResponse(NewsClassificationBase):
     """Schema for NewsClassification response"""
 
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+
+class PaginatedResponse(BaseModel, Generic[T]):
+    """Schema for a page of results with a cursor to fetch the next page"""
+
+    items: List[T]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,52 @@
+"""
+In-process cache for ranked search results.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class SearchCache:
+    """
+    Small LRU cache with a time-to-live, mapping a normalized query to the ranked
+    document ids it produced.
+
+    Only ids are cached; documents are always hydrated fresh so edits are visible
+    immediately. The indexing service clears the cache whenever the index changes.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, Tuple[float, Tuple[int, ...]]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: Hashable) -> Optional[Tuple[int, ...]]:
+        """Return the cached ids for `key`, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, doc_ids = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return doc_ids
+
+    def set(self, key: Hashable, doc_ids: Tuple[int, ...]):
+        """Store ids for `key`, evicting the least recently used entries."""
+        self._entries[key] = (time.monotonic() + self.ttl, doc_ids)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached results."""
+        self._entries.clear()
+
+
+# Shared by the default search and indexing services so index writes invalidate
+# cached search results.
+default_search_cache = SearchCache()
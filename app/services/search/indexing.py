@@ -2,21 +2,57 @@
 Service for indexing documents for the search engine.
 """
 
+import asyncio
 import math
-from typing import List
+import multiprocessing
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from tortoise import connections
+from tortoise.transactions import in_transaction
 from app.models import NewsClassification, IndexToken, IndexEntry
+from app.services.search.cache import SearchCache, default_search_cache
 from app.services.search.tokenizers import (
+    CompositeTokenizer,
+    RawToken,
     Tokenizer,
     WordTokenizer,
     PrefixTokenizer,
     NGramTokenizer,
 )
 
+# ceil(sqrt(n)) for every token length up to 1023, used to scale entry weights
+_CEIL_SQRT = [math.ceil(math.sqrt(i)) for i in range(1024)]
+
+# Upper bound on the number of token names bound in a single statement, kept
+# well below SQLite's host parameter limit.
+TOKEN_LOOKUP_BATCH_SIZE = 5000
+
+# Inserts new tokens and returns their ids in the same statement. A token
+# inserted concurrently hits the no-op update, so its id is returned as well.
+INSERT_TOKENS_SQL = """
+INSERT INTO index_tokens (name) VALUES {values}
+ON CONFLICT (name) DO UPDATE SET name = excluded.name
+RETURNING id, name
+"""
+
+# Entries are written as plain parameter tuples with executemany, which skips
+# building an IndexEntry model instance per row.
+INSERT_ENTRIES_SQL = """
+INSERT INTO index_entries (token_id, document_id, document_type, field_id, weight)
+VALUES (?, ?, ?, ?, ?)
+"""
+
 
 class IndexingService:
     """Service to handle the indexing of documents."""
 
-    def __init__(self, tokenizers: List[Tokenizer] = None):
+    def __init__(
+        self,
+        tokenizers: List[Tokenizer] = None,
+        search_cache: Optional[SearchCache] = None,
+    ):
         if tokenizers is None:
             self.tokenizers = [
                 WordTokenizer(),
@@ -25,63 +61,225 @@ class IndexingService:
             ]
         else:
             self.tokenizers = tokenizers
+        self.composite_tokenizer = CompositeTokenizer(self.tokenizers)
+        self.search_cache = search_cache
 
     async def index_document(self, document: NewsClassification):
-        """Index a single document."""
-        await self.remove_document_from_index(document.id)
+        """Index a single document within a single transaction."""
+        all_tokens = self._tokenize(document.review)
 
-        entries_to_create = []
-        field_weight = 10
-        all_tokens = []
-        for tokenizer in self.tokenizers:
-            all_tokens.extend(tokenizer.tokenize(document.review))
-
-        token_values = list(set(t.value for t in all_tokens))
-        existing_tokens = await IndexToken.filter(name__in=token_values)
-        existing_token_map = {t.name: t for t in existing_tokens}
+        async with in_transaction() as connection:
+            await self.remove_document_from_index(document.id, connection)
 
-        new_token_values = [t for t in token_values if t not in existing_token_map]
-        if new_token_values:
-            await IndexToken.bulk_create([IndexToken(name=v) for v in new_token_values])
-            new_tokens = await IndexToken.filter(name__in=new_token_values)
-            for t in new_tokens:
-                existing_token_map[t.name] = t
-
-        for token in all_tokens:
-            token_obj = existing_token_map.get(token.value)
-            if token_obj is None:
-                continue
-            final_weight = (
-                field_weight * token.weight * math.ceil(math.sqrt(len(token.value)))
-            )
-            entries_to_create.append(
-                IndexEntry(
-                    token=token_obj,
-                    document_id=document.id,
-                    document_type="NewsClassification",
-                    field_id="review",
-                    weight=final_weight,
-                )
+            token_map = await self._get_or_create_tokens(
+                {value for value, _ in all_tokens}, connection
             )
+            entry_rows = self._build_entries(document, all_tokens, token_map)
 
-        if entries_to_create:
-            await IndexEntry.bulk_create(entries_to_create)
+            if entry_rows:
+                await connection.execute_many(INSERT_ENTRIES_SQL, entry_rows)
 
-        document.token_count = len(entries_to_create)
-        await document.save(update_fields=["token_count"])
+            document.token_count = len(entry_rows)
+            await document.save(update_fields=["token_count"], using_db=connection)
 
-    async def remove_document_from_index(self, document_id: int):
+        self._invalidate_search_cache()
+
+    async def remove_document_from_index(self, document_id: int, connection=None):
         """Remove all index entries for a given document."""
-        await IndexEntry.filter(document_id=document_id).delete()
+        await IndexEntry.filter(document_id=document_id).using_db(connection).delete()
+        self._invalidate_search_cache()
+
+    async def reindex_all(
+        self, chunk_size: int = 500, max_workers: Optional[int] = None
+    ):
+        """
+        Re-index all documents in the database.
+
+        Documents are read and processed in chunks of `chunk_size`, so tokens,
+        entries and token counts are written with a handful of bulk statements per
+        chunk instead of several round-trips per document, and memory stays
+        bounded by the chunk size rather than the corpus size.
 
-    async def reindex_all(self):
-        """Re-index all documents in the database."""
+        Tokenization is CPU-bound pure Python, so chunks are tokenized in a pool
+        of `max_workers` processes (one per CPU by default) while the database
+        writes stay on the event loop.
+        """
         await IndexToken.all().delete()
         await IndexEntry.all().delete()
-        async for document in NewsClassification.all():
-            await self.index_document(document)
+
+        if await NewsClassification.all().count() <= chunk_size:
+            # A single chunk is not worth the cost of starting worker processes
+            async for chunk in self._iter_document_chunks(chunk_size):
+                await self._index_chunk(
+                    chunk, self._tokenize_batch([doc.review for doc in chunk])
+                )
+        else:
+            await self._reindex_in_pool(chunk_size, max_workers or os.cpu_count() or 1)
+
+        self._invalidate_search_cache()
+
+    async def _reindex_in_pool(self, chunk_size: int, max_workers: int):
+        """Index all documents, tokenizing chunks in a process pool."""
+        loop = asyncio.get_running_loop()
+        # At most this many chunks are tokenized or waiting to be written, so
+        # the workers stay busy without the pending output piling up.
+        max_pending = 2 * max_workers
+        pending = deque()
+        # fork() is unsafe here, as aiosqlite runs the connection in a thread.
+        # forkserver is not available on Windows, where spawn is used instead.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("forkserver")
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers, mp_context=mp_context) as pool:
+            async for chunk in self._iter_document_chunks(chunk_size):
+                future = loop.run_in_executor(
+                    pool,
+                    self.composite_tokenizer.tokenize_batch,
+                    [doc.review for doc in chunk],
+                )
+                pending.append((chunk, future))
+                if len(pending) >= max_pending:
+                    chunk, future = pending.popleft()
+                    await self._index_chunk(chunk, await future)
+            while pending:
+                chunk, future = pending.popleft()
+                await self._index_chunk(chunk, await future)
+
+    async def _iter_document_chunks(
+        self, chunk_size: int
+    ) -> AsyncIterator[List[NewsClassification]]:
+        """Yield all documents in id order, `chunk_size` at a time."""
+        last_id = 0
+        while True:
+            chunk = (
+                await NewsClassification.filter(id__gt=last_id)
+                .order_by("id")
+                .limit(chunk_size)
+                .only("id", "review")
+            )
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            last_id = chunk[-1].id
+
+    async def _index_chunk(
+        self, documents: List[NewsClassification], tokens: List[List[RawToken]]
+    ):
+        """
+        Index a chunk of documents within a single transaction, given the tokens
+        of each document.
+        """
+        tokens_per_document = list(zip(documents, tokens))
+        token_values = {
+            value
+            for _, document_tokens in tokens_per_document
+            for value, _ in document_tokens
+        }
+
+        async with in_transaction() as connection:
+            token_map = await self._get_or_create_tokens(token_values, connection)
+
+            entry_rows = []
+            for document, document_tokens in tokens_per_document:
+                rows = self._build_entries(document, document_tokens, token_map)
+                document.token_count = len(rows)
+                entry_rows.extend(rows)
+
+            if entry_rows:
+                await connection.execute_many(INSERT_ENTRIES_SQL, entry_rows)
+            await NewsClassification.bulk_update(
+                documents, fields=["token_count"], batch_size=1000, using_db=connection
+            )
+
+    def _invalidate_search_cache(self):
+        if self.search_cache is not None:
+            self.search_cache.clear()
+
+    def _tokenize(self, text: str) -> List[RawToken]:
+        """Run the text through all configured tokenizers."""
+        return self.composite_tokenizer.tokenize(text)
+
+    def _tokenize_batch(self, texts: List[str]) -> List[List[RawToken]]:
+        """Run several texts through all tokenizers, one token list per text."""
+        return self.composite_tokenizer.tokenize_batch(texts)
+
+    async def _get_or_create_tokens(
+        self, token_values: Iterable[str], connection=None
+    ) -> Dict[str, int]:
+        """Return a name -> token id map, creating any tokens that are missing."""
+        token_values = list(token_values)
+        token_map = await self._fetch_tokens(token_values, connection)
+
+        new_token_values = [v for v in token_values if v not in token_map]
+        if new_token_values:
+            token_map.update(await self._insert_tokens(new_token_values, connection))
+        return token_map
+
+    async def _fetch_tokens(
+        self, token_values: List[str], connection=None
+    ) -> Dict[str, int]:
+        token_map = {}
+        for i in range(0, len(token_values), TOKEN_LOOKUP_BATCH_SIZE):
+            batch = token_values[i : i + TOKEN_LOOKUP_BATCH_SIZE]
+            rows = (
+                await IndexToken.filter(name__in=batch)
+                .using_db(connection)
+                .values_list("name", "id")
+            )
+            token_map.update(rows)
+        return token_map
+
+    async def _insert_tokens(
+        self, token_values: List[str], connection=None
+    ) -> Dict[str, int]:
+        db = connection or connections.get("default")
+        token_map = {}
+        for i in range(0, len(token_values), TOKEN_LOOKUP_BATCH_SIZE):
+            batch = token_values[i : i + TOKEN_LOOKUP_BATCH_SIZE]
+            values = ", ".join("(?)" for _ in batch)
+            rows = await db.execute_query_dict(
+                INSERT_TOKENS_SQL.format(values=values), batch
+            )
+            token_map.update((row["name"], row["id"]) for row in rows)
+        return token_map
+
+    def _build_entries(
+        self,
+        document: NewsClassification,
+        tokens: List[RawToken],
+        token_map: Dict[str, int],
+    ) -> List[Tuple[int, int, str, str, int]]:
+        """
+        Build the index_entries rows linking the document to its tokens, as
+        parameter tuples for `INSERT_ENTRIES_SQL`.
+
+        Tokenizers can produce the same value (e.g. a word that is also a prefix),
+        so weights are summed per value and each token gets a single entry.
+        """
+        token_weights = defaultdict(int)
+        for value, weight in tokens:
+            token_weights[value] += weight
+
+        entries = []
+        field_weight = 10
+        for value, weight in token_weights.items():
+            token_id = token_map.get(value)
+            if token_id is None:
+                continue
+            length = len(value)
+            length_factor = (
+                _CEIL_SQRT[length] if length < 1024 else math.ceil(math.sqrt(length))
+            )
+            final_weight = field_weight * weight * length_factor
+            entries.append(
+                (token_id, document.id, "NewsClassification", "review", final_weight)
+            )
+        return entries
 
 
 class DefaultIndexingService(IndexingService):
     def __init__(self):
-        super().__init__()
+        super().__init__(search_cache=default_search_cache)
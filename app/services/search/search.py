@@ -2,16 +2,35 @@
 Service for searching documents using a multi-tokenization inverted index strategy.
 """
 
-from typing import List
-from tortoise.functions import Sum, Count, Avg
-from app.models import IndexEntry, NewsClassification
+import heapq
+from typing import List, Optional, Tuple
+from tortoise import connections
+from app.models import NewsClassification
+from app.services.search.cache import SearchCache, default_search_cache
 from app.services.search.tokenizers import (
+    CompositeTokenizer,
+    RawToken,
     Tokenizer,
     WordTokenizer,
     PrefixTokenizer,
     NGramTokenizer,
 )
 
+# Scores and ranks matching documents entirely in SQLite:
+# Σ weights * (1 + unique_token_count) * (1 + avg_weight) / max(token_count, 1)
+RANKED_DOCUMENTS_SQL = """
+SELECT e.document_id,
+       SUM(e.weight) * (1 + COUNT(DISTINCT e.token_id)) * (1 + AVG(e.weight))
+           / MAX(d.token_count, 1) AS score
+FROM index_entries AS e
+JOIN index_tokens AS t ON t.id = e.token_id
+JOIN news_classifications AS d ON d.id = e.document_id
+WHERE t.name IN ({placeholders})
+GROUP BY e.document_id
+ORDER BY score DESC, e.document_id
+LIMIT ?
+"""
+
 
 class SearchService:
     """
@@ -35,7 +54,11 @@ class SearchService:
     while the average weight acts as a quality signal for the matches found.
     """
 
-    def __init__(self, tokenizers: List[Tokenizer] = None):
+    def __init__(
+        self,
+        tokenizers: List[Tokenizer] = None,
+        cache: Optional[SearchCache] = None,
+    ):
         if tokenizers is None:
             self.tokenizers = [
                 WordTokenizer(),
@@ -44,6 +67,8 @@ class SearchService:
             ]
         else:
             self.tokenizers = tokenizers
+        self.composite_tokenizer = CompositeTokenizer(self.tokenizers)
+        self.cache = cache
 
     async def search(self, query: str, limit: int = 10) -> List[NewsClassification]:
         """
@@ -52,71 +77,50 @@ class SearchService:
         1. Tokenizes the input query using all configured tokenizers.
         2. Retrieves matching IndexEntry records, grouping by document.
         3. Calculates base metrics: total weight, token diversity, and average weight.
-        4. Normalizes scores by document length and sorts by relevance.
+        4. Normalizes scores by document length and keeps the top `limit` results.
         5. Fetches and returns the full NewsClassification objects for the top results.
+
+        Steps 2-4 run as a single SQL query, so only the top `limit` document ids
+        are returned from the database. When a cache is configured, the ranked ids
+        are cached per normalized query and limit, and steps 1-4 are skipped on a hit.
         """
-        query_tokens = self._tokenize_query(query)
-        if not query_tokens:
+        if self.cache is None:
+            doc_ids = await self._rank_documents(query, limit)
+        else:
+            key = (query.strip().lower(), limit)
+            doc_ids = self.cache.get(key)
+            if doc_ids is None:
+                doc_ids = await self._rank_documents(query, limit)
+                self.cache.set(key, doc_ids)
+
+        if not doc_ids:
             return []
 
-        token_values = sorted(
-            list(set(token.value for token in query_tokens)),
-            key=len,
-            reverse=True,
-        )
-        if len(token_values) > 300:
-            token_values = token_values[:300]
-
-        base_query = (
-            IndexEntry.filter(token__name__in=token_values)
-            .group_by("document_id")
-            .annotate(
-                base_score=Sum("weight"),
-                token_diversity=Count("token_id", distinct=True),
-                avg_weight=Avg("weight"),
-            )
-        )
+        doc_map = await NewsClassification.in_bulk(doc_ids, field_name="id")
+        return [doc_map[doc_id] for doc_id in doc_ids if doc_id in doc_map]
 
-        results = await base_query.values(
-            "document_id", "base_score", "token_diversity", "avg_weight"
-        )
+    async def _rank_documents(self, query: str, limit: int) -> Tuple[int, ...]:
+        """Return the ids of the top `limit` documents for the query, best first."""
+        query_tokens = self._tokenize_query(query)
+        if not query_tokens:
+            return ()
 
-        doc_ids = [r["document_id"] for r in results]
-        documents = await NewsClassification.filter(id__in=doc_ids).values(
-            "id", "token_count"
+        # Keep at most the 300 longest (most specific) tokens
+        token_values = heapq.nlargest(
+            300, set(value for value, _ in query_tokens), key=len
         )
-        doc_token_map = {doc["id"]: doc["token_count"] for doc in documents}
-
-        scored_results = []
-        for r in results:
-            doc_token_count = doc_token_map.get(r["document_id"], 1)
-            if doc_token_count == 0:
-                doc_token_count = 1
-
-            score = (
-                r["base_score"]
-                * (1 + r.get("token_diversity", 0))
-                * (1 + r.get("avg_weight", 0))
-            ) / doc_token_count
-            scored_results.append({"document_id": r["document_id"], "score": score})
-
-        sorted_results = sorted(scored_results, key=lambda x: x["score"], reverse=True)
-        doc_ids = [result["document_id"] for result in sorted_results[:limit]]
 
-        if not doc_ids:
-            return []
-
-        documents = await NewsClassification.filter(id__in=doc_ids)
-        doc_map = {doc.id: doc for doc in documents}
-        return [doc_map[doc_id] for doc_id in doc_ids if doc_id in doc_map]
+        placeholders = ", ".join("?" for _ in token_values)
+        rows = await connections.get("default").execute_query_dict(
+            RANKED_DOCUMENTS_SQL.format(placeholders=placeholders),
+            [*token_values, limit],
+        )
+        return tuple(row["document_id"] for row in rows)
 
-    def _tokenize_query(self, query: str) -> List:
-        tokens = []
-        for tokenizer in self.tokenizers:
-            tokens.extend(tokenizer.tokenize(query))
-        return tokens
+    def _tokenize_query(self, query: str) -> List[RawToken]:
+        return self.composite_tokenizer.tokenize(query)
 
 
 class DefaultSearchService(SearchService):
     def __init__(self):
-        super().__init__()
+        super().__init__(cache=default_search_cache)
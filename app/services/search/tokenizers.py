@@ -2,96 +2,194 @@
 Tokenizers for the search engine.
 """
 
-import re
+import sys
 from abc import ABC, abstractmethod
-from typing import List
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
 from unidecode import unidecode
-from dataclasses import dataclass
 
-COMPILED_RE_TOKEN_NORMALIZATION_A = re.compile(r"[^a-z0-9]")
-COMPILED_RE_TOKEN_NORMALIZATION_B = re.compile(r"\s+")
+# Byte translation table applied to ASCII text: letters are lowercased, digits
+# are kept and every other byte becomes a space.
+TOKEN_NORMALIZATION_TABLE = bytes(
+    ord(c.lower()) if c.isascii() and c.isalnum() else ord(" ")
+    for c in map(chr, range(256))
+)
 
+# unidecode's transliterations for Latin-1 and Latin Extended-A/B (U+0080-U+024F),
+# which cover nearly all non-ASCII characters in the news corpus.
+LATIN_ASCII_FOLD_TABLE = {i: unidecode(chr(i)) for i in range(0x80, 0x250)}
 
-@dataclass(frozen=True, slots=True)
-class Token:
+
+def _to_ascii(text: str) -> str:
+    """Transliterate text to ASCII, falling back to unidecode outside the table."""
+    if text.isascii():
+        return text
+    folded = text.translate(LATIN_ASCII_FOLD_TABLE)
+    if folded.isascii():
+        return folded
+    return unidecode(folded)
+
+
+def normalize_text(text: str) -> str:
+    """Transliterate text to lowercase ASCII, replacing special characters with spaces."""
+    text = _to_ascii(text).encode("ascii", "ignore")
+    return text.translate(TOKEN_NORMALIZATION_TABLE).decode("ascii")
+
+
+@lru_cache(maxsize=4096)
+def extract_words(text: str) -> Tuple[str, ...]:
+    """
+    Extract words of at least two characters from normalized text.
+
+    News datasets repeat headlines often, so results are memoized per text. The
+    words are returned as a tuple so the cached value cannot be mutated, and are
+    interned since the same words recur across thousands of documents.
+    """
+    intern = sys.intern
+    return tuple(
+        intern(word) for word in normalize_text(text).split() if len(word) >= 2
+    )
+
+
+def extract_words_batch(texts: List[str]) -> List[Tuple[str, ...]]:
+    """Extract the words of several texts, one word list per text."""
+    return [extract_words(text) for text in texts]
+
+
+class Token(NamedTuple):
     """Represents a token with its value and weight."""
 
     value: str
     weight: int
 
 
+# Plain (value, weight) pair used on the indexing hot path, where even the
+# NamedTuple constructor call per generated token is measurable overhead.
+RawToken = Tuple[str, int]
+
+
 class Tokenizer(ABC):
     """Abstract base class for tokenizers."""
 
+    # Tokenizers are read on every document during indexing; slots keep their
+    # attribute reads off the instance __dict__.
+    __slots__ = ("weight",)
+
     def __init__(self, weight: int):
         self.weight = weight
 
-    @abstractmethod
     def tokenize(self, text: str) -> List[Token]:
         """Tokenize the given text."""
-        pass
+        return list(map(Token._make, self._tokens_from_words(extract_words(text))))
+
+    def tokenize_batch(self, texts: List[str]) -> List[List[Token]]:
+        """Tokenize several texts, returning one token list per text."""
+        return [
+            list(map(Token._make, self._tokens_from_words(words)))
+            for words in extract_words_batch(texts)
+        ]
 
     def get_weight(self) -> int:
         """Return the tokenizer's weight."""
         return self.weight
 
-    def _normalize(self, text: str) -> str:
-        """Normalize text by lowercasing, removing special characters, and handling whitespace."""
-        text = unidecode(text)
-        text = text.lower()
-        text = COMPILED_RE_TOKEN_NORMALIZATION_A.sub(" ", text)
-        text = COMPILED_RE_TOKEN_NORMALIZATION_B.sub(" ", text)
-        return text.strip()
-
-    def _extract_words(self, text: str) -> List[str]:
-        """Extract words from normalized text."""
-        normalized_text = self._normalize(text)
-        return [word for word in normalized_text.split(" ") if len(word) >= 2]
+    @abstractmethod
+    def _tokens_from_words(self, words: Tuple[str, ...]) -> List[RawToken]:
+        """Build (value, weight) tokens from the words extracted from a text."""
+        pass
 
 
 class WordTokenizer(Tokenizer):
     """Splits text into individual words."""
 
+    __slots__ = ()
+
     def __init__(self, weight: int = 20):
         super().__init__(weight)
 
-    def tokenize(self, text: str) -> List[Token]:
-        """Tokenize text into words."""
-        words = self._extract_words(text)
-        return [Token(word, self.weight) for word in set(words)]
+    def _tokens_from_words(self, words: Tuple[str, ...]) -> List[RawToken]:
+        """Tokenize words into distinct words."""
+        weight = self.weight
+        return [(word, weight) for word in set(words)]
 
 
 class PrefixTokenizer(Tokenizer):
     """Generates word prefixes."""
 
+    __slots__ = ("min_prefix_len",)
+
     def __init__(self, weight: int = 5, min_prefix_len: int = 4):
         super().__init__(weight)
         self.min_prefix_len = min_prefix_len
 
-    def tokenize(self, text: str) -> List[Token]:
-        """Tokenize text into prefixes."""
-        words = self._extract_words(text)
+    def _tokens_from_words(self, words: Tuple[str, ...]) -> List[RawToken]:
+        """Tokenize words into prefixes."""
+        words = sorted(set(words))
+        min_len = self.min_prefix_len
+        weight = self.weight
         tokens = set()
-        for word in words:
-            if len(word) >= self.min_prefix_len:
-                for i in range(self.min_prefix_len, len(word) + 1):
-                    tokens.add(word[:i])
-        return [Token(token, self.weight) for token in tokens]
+        # Each distinct word is expanded once. A word that starts the next word in
+        # sorted order is skipped, as the longer word yields all of its prefixes.
+        for word, next_word in zip(words, words[1:] + [""]):
+            if next_word.startswith(word):
+                continue
+            tokens.update(word[:i] for i in range(min_len, len(word) + 1))
+        # Intern after deduplication, so each distinct prefix is interned once
+        intern = sys.intern
+        return [(intern(token), weight) for token in tokens]
 
 
 class NGramTokenizer(Tokenizer):
     """Creates character n-grams."""
 
+    __slots__ = ("ngram_len",)
+
     def __init__(self, weight: int = 1, ngram_len: int = 3):
         super().__init__(weight)
         self.ngram_len = ngram_len
 
-    def tokenize(self, text: str) -> List[Token]:
-        """Tokenize text into n-grams."""
-        words = self._extract_words(text)
-        tokens = set()
-        for word in words:
-            if len(word) >= self.ngram_len:
-                for i in range(len(word) - self.ngram_len + 1):
-                    tokens.add(word[i : i + self.ngram_len])
-        return [Token(token, self.weight) for token in tokens]
+    def _tokens_from_words(self, words: Tuple[str, ...]) -> List[RawToken]:
+        """Tokenize words into n-grams."""
+        n = self.ngram_len
+        weight = self.weight
+        # Repeated words yield the same n-grams, so expand each word only once.
+        # Direct slicing is faster here than joining zip(word, word[1:], ...)
+        # tuples, which builds an extra tuple per n-gram.
+        tokens = {
+            word[i : i + n] for word in set(words) for i in range(len(word) - n + 1)
+        }
+        intern = sys.intern
+        return [(intern(token), weight) for token in tokens]
+
+
+class CompositeTokenizer:
+    """
+    Runs several tokenizers over a text, normalizing it only once.
+
+    The text's words are extracted a single time and fanned out to every
+    tokenizer, instead of each tokenizer normalizing the same text again.
+    Tokens are returned as (value, weight) tuples for the indexing hot path.
+    """
+
+    __slots__ = ("tokenizers",)
+
+    def __init__(self, tokenizers: List[Tokenizer]):
+        self.tokenizers = tokenizers
+
+    def tokenize(self, text: str) -> List[RawToken]:
+        """Tokenize the text with all tokenizers."""
+        words = extract_words(text)
+        return [
+            token
+            for tokenizer in self.tokenizers
+            for token in tokenizer._tokens_from_words(words)
+        ]
+
+    def tokenize_batch(self, texts: List[str]) -> List[List[RawToken]]:
+        """Tokenize several texts, returning one token list per text."""
+        # Duplicate texts within the batch share a single token list
+        tokens_by_text = {}
+        for text in texts:
+            if text not in tokens_by_text:
+                tokens_by_text[text] = self.tokenize(text)
+        return [tokens_by_text[text] for text in texts]
@@ -5,6 +5,7 @@ Uses Tortoise ORM with SQLite database and Hugging Face dataset for seed data.
 
 import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from app.database import init_db, close_db
 from app.routes.news import router as news_router
@@ -28,6 +29,7 @@ app = FastAPI(
     description="API for managing news text classifications using data from Hugging Face",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Include routers
@@ -7,73 +7,47 @@ If the Hugging Face dataset is not accessible, it will use sample data.
 
 import asyncio
 from app.models import NewsClassification
+from tortoise.functions import Count
+from tortoise.transactions import in_transaction
 from app.database import init_db, close_db
 from app.services.search.indexing import IndexingService
 
 
-# Sample data for fallback when Hugging Face is not accessible
-SAMPLE_DATA = [
-    {
-        "review": "The Federal Reserve announced a rate hike today, affecting markets worldwide.",
-        "label": "BUSINESS",
-    },
-    {
-        "review": "The new budget proposal includes significant infrastructure spending.",
-        "label": "POLITICS",
-    },
-    {
-        "review": "Scientists discover breakthrough in renewable energy technology.",
-        "label": "SCIENCE",
-    },
-    {
-        "review": "Local team wins championship in thrilling overtime victory.",
-        "label": "SPORTS",
-    },
-    {
-        "review": "New exhibition opens at the national museum showcasing modern art.",
-        "label": "ENTERTAINMENT",
-    },
-    {
-        "review": "Stock markets rally on positive earnings reports from tech sector.",
-        "label": "BUSINESS",
-    },
-    {
-        "review": "Senate debates new healthcare legislation in heated session.",
-        "label": "POLITICS",
-    },
-    {
-        "review": "Climate change report warns of accelerating global temperatures.",
-        "label": "SCIENCE",
-    },
-    {
-        "review": "Olympic athlete breaks world record in swimming competition.",
-        "label": "SPORTS",
-    },
-    {
-        "review": "Blockbuster film dominates box office on opening weekend.",
-        "label": "ENTERTAINMENT",
-    },
-    {
-        "review": "Major tech company announces quarterly profits exceeding expectations.",
-        "label": "BUSINESS",
-    },
-    {
-        "review": "Presidential candidate outlines economic policy platform.",
-        "label": "POLITICS",
-    },
-    {
-        "review": "New study reveals insights into human brain function.",
-        "label": "SCIENCE",
-    },
-    {
-        "review": "Tennis star advances to finals with dominant performance.",
-        "label": "SPORTS",
-    },
-    {
-        "review": "Music festival announces star-studded lineup for summer.",
-        "label": "ENTERTAINMENT",
-    },
-]
+# Sample (review, label) pairs for fallback when Hugging Face is not accessible
+SAMPLE_DATA = (
+    (
+        "The Federal Reserve announced a rate hike today, affecting markets worldwide.",
+        "BUSINESS",
+    ),
+    (
+        "The new budget proposal includes significant infrastructure spending.",
+        "POLITICS",
+    ),
+    ("Scientists discover breakthrough in renewable energy technology.", "SCIENCE"),
+    ("Local team wins championship in thrilling overtime victory.", "SPORTS"),
+    (
+        "New exhibition opens at the national museum showcasing modern art.",
+        "ENTERTAINMENT",
+    ),
+    ("Stock markets rally on positive earnings reports from tech sector.", "BUSINESS"),
+    ("Senate debates new healthcare legislation in heated session.", "POLITICS"),
+    ("Climate change report warns of accelerating global temperatures.", "SCIENCE"),
+    ("Olympic athlete breaks world record in swimming competition.", "SPORTS"),
+    ("Blockbuster film dominates box office on opening weekend.", "ENTERTAINMENT"),
+    (
+        "Major tech company announces quarterly profits exceeding expectations.",
+        "BUSINESS",
+    ),
+    ("Presidential candidate outlines economic policy platform.", "POLITICS"),
+    ("New study reveals insights into human brain function.", "SCIENCE"),
+    ("Tennis star advances to finals with dominant performance.", "SPORTS"),
+    ("Music festival announces star-studded lineup for summer.", "ENTERTAINMENT"),
+)
+
+
+def _to_records(batch):
+    """Map a batch of dataset columns to NewsClassification fields."""
+    return {"review": batch["text"], "label": batch["label"]}
 
 
 async def seed_database():
@@ -100,61 +74,67 @@ async def seed_database():
     try:
         # Try to load from Hugging Face
         from datasets import load_dataset
-        if True:
-            print("Attempting to load from Hugging Face...")
-            dataset = load_dataset(
-            "argilla/synthetic-text-classification-news", split="train"
-            )
-            print(f"Loaded {len(dataset)} records from Hugging Face dataset.")
-        else:
-            dataset = SAMPLE_DATA
 
-        # Insert data into database
+        print("Attempting to load from Hugging Face...")
+        # Stream records instead of materializing the whole split in memory
+        dataset = load_dataset(
+            "argilla/synthetic-text-classification-news", split="train", streaming=True
+        )
+        print("Streaming records from Hugging Face dataset.")
+        # The dataset has 'text' and 'label' columns
+        # We'll map 'text' to 'review' in our model, a batch at a time
+        dataset = dataset.map(
+            _to_records, batched=True, remove_columns=dataset.column_names
+        )
+
+        # Insert data into database. All batches share one transaction, so the
+        # ingestion pays for a single commit, and a failed download leaves no
+        # partial data behind before falling back to the sample data.
         print("Inserting data into database...")
-        batch_size = 100
+        batch_size = 2000
         records_to_create = []
 
-        for idx, item in enumerate(dataset):
-            # The dataset has 'text' and 'label' columns
-            # We'll map 'text' to 'review' in our model
-            record_data = {
-                "review": item.get("text", item.get("review", "")),
-                "label": item.get("label", ""),
-            }
-            records_to_create.append(record_data)
-
-            # Insert in batches
-            if len(records_to_create) >= batch_size:
-                await NewsClassification.bulk_create(
-                    [NewsClassification(**data) for data in records_to_create]
+        async with in_transaction() as connection:
+            for idx, item in enumerate(dataset):
+                records_to_create.append(
+                    {"review": item["review"], "label": item["label"]}
                 )
-                print(f"Inserted {idx + 1} records...")
-                records_to_create = []
 
-        # Insert remaining records
-        if records_to_create:
-            await NewsClassification.bulk_create(
-                [NewsClassification(**data) for data in records_to_create]
-            )
+                # Insert in batches
+                if len(records_to_create) >= batch_size:
+                    await NewsClassification.bulk_create(
+                        [NewsClassification(**data) for data in records_to_create],
+                        using_db=connection,
+                    )
+                    print(f"Inserted {idx + 1} records...")
+                    records_to_create = []
+
+            # Insert remaining records
+            if records_to_create:
+                await NewsClassification.bulk_create(
+                    [NewsClassification(**data) for data in records_to_create],
+                    using_db=connection,
+                )
 
     except Exception as e:
         print(f"Could not load from Hugging Face: {e}")
         print("Using sample data instead...")
 
         # Use sample data
-        for idx, data in enumerate(SAMPLE_DATA):
-            await NewsClassification.create(**data)
+        for idx, (review, label) in enumerate(SAMPLE_DATA):
+            await NewsClassification.create(review=review, label=label)
             print(f"Inserted {idx + 1}/{len(SAMPLE_DATA)} records...")
 
-    total_count = await NewsClassification.all().count()
+    # Count records per label in SQL; the total is the sum of the label counts
+    label_counts = dict(
+        await NewsClassification.annotate(count=Count("id"))
+        .group_by("label")
+        .values_list("label", "count")
+    )
+    total_count = sum(label_counts.values())
     print(f"\n✓ Successfully seeded database with {total_count} records!")
 
     # Show label distribution
-    labels = await NewsClassification.all().values_list("label", flat=True)
-    label_counts = {}
-    for label in labels:
-        label_counts[label] = label_counts.get(label, 0) + 1
-
     print("\nLabel distribution:")
     for label, count in sorted(label_counts.items()):
         print(f"  {label}: {count}")